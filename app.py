@@ -1,13 +1,73 @@
+import os
+
+# 세션마다 스크립트가 도는 환경이라 BLAS/OpenMP 스레드가 서로 경합하지 않도록
+# numpy/numba import 전에 스레드 수 고정 (관측 자료는 수백 층뿐이라 병렬 이득 없음)
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+os.environ.setdefault("NUMBA_NUM_THREADS", "2")
+
+import io
 import time
+from datetime import datetime
+
+import metpy.calc as mpcalc
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from metpy.plots import SkewT
+import numpy as np
+import pandas as pd
 import requests
+import streamlit as st
+from metpy.units import units
+from PIL import Image
+
+try:
+    import calc_fast
+except ImportError:  # Numba 없으면 MetPy로 계산
+    calc_fast = None
+
+# 인증 오류 응답 판별용 (EUC-KR 바이트)
+_AUTH_SENTINEL_KO = "인증".encode("euc-kr")
+
+
+@st.cache_resource
+def _etag_store():
+    # URL별 마지막 응답의 ETag / Last-Modified와 파싱 결과 (조건부 요청용)
+    # Streamlit은 rerun마다 스크립트를 다시 실행하므로 모듈 전역 대신 cache_resource에 보관
+    return {}
+
+
+@st.cache_resource
+def _http_session():
+    # rerun마다 TCP/TLS 연결을 새로 맺지 않도록 keep-alive 세션 재사용
+    # (requests 기본 헤더에 gzip / keep-alive 포함)
+    return requests.Session()
+
+
+def _conditional_headers(url):
+    cached = _etag_store().get(url)
+    if not cached or "result" not in cached:
+        return {}
+
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
 
-def fetch_sounding(max_retries=3):
+def fetch_sounding(max_retries=3, url=None):
+    url = url or ZONDE_URL
     last_error = None
 
     for attempt in range(1, max_retries + 1):
         try:
             # connect 5초, read 20초로 분리
-            resp = requests.get(ZONDE_URL, timeout=(5, 20))
+            resp = _http_session().get(
+                url, headers=_conditional_headers(url), timeout=(5, 20)
+            )
             break  # 성공하면 루프 탈출
         except requests.exceptions.Timeout as e:
             last_error = e
@@ -22,7 +82,12 @@ def fetch_sounding(max_retries=3):
         except Exception as e:
             # 다른 네트워크 에러
             raise ValueError(f"ZONDE API에 연결할 수 없습니다: {e}")
-    
+
+    # 304: 서버 자료가 그대로라 본문 없이 이전 파싱 결과 재사용
+    store = _etag_store()
+    if resp.status_code == 304 and "result" in store.get(url, {}):
+        return store[url]["result"]
+
     # 여기까지 왔다는 건 resp가 성공적으로 들어온 상태
     if resp.status_code != 200:
         preview = resp.text[:200]
@@ -31,7 +96,188 @@ def fetch_sounding(max_retries=3):
             f"응답 내용 일부: {preview}"
         )
 
-    resp.encoding = "euc-kr"
-    text = resp.text
-    ...
-    # 이하 나머지 파싱 코드는 그대로
+    # 인증 오류 페이지면 본문 전체를 EUC-KR로 디코딩하기 전에 앞부분 바이트만 보고 거름
+    raw = resp.content
+    head = raw[:512]
+    if b"auth" in head.lower() or _AUTH_SENTINEL_KO in head:
+        raise ValueError(
+            f"ZONDE API 인증 오류(authKey 확인 필요)\n"
+            f"응답 내용 일부: {head[:200].decode('euc-kr', errors='replace')}"
+        )
+    text = raw.decode("euc-kr", errors="replace")
+
+    # 고정 스키마 공백 구분 텍스트라 pandas 파서 대신 NumPy로 필요한 열만 읽음
+    # (0: YYMMDDHHMI, 2: PA, 4: TA, 5: TD)
+    arr = np.loadtxt(io.StringIO(text), comments="#", usecols=(0, 2, 4, 5), ndmin=2)
+
+    # 결측(-999) 층은 불리언 마스크로 걸러 인덱스만 만들고, 정렬까지 한 번에 복사
+    valid = np.flatnonzero(
+        (arr[:, 1] != -999.0) & (arr[:, 2] != -999.0) & (arr[:, 3] != -999.0)
+    )
+    if valid.size == 0:
+        raise ValueError("ZONDE 응답에 유효한 관측 층이 없습니다.")
+    arr = arr[valid[np.argsort(-arr[valid, 1])]]
+
+    # 그림에는 관측 시각 하나만 쓰이므로 첫 행만 파싱
+    obs_time = datetime.strptime(str(int(arr[0, 0])), "%Y%m%d%H%M")
+
+    # pint 단위 없이 float32 배열(hPa, °C)로 반환 — 단위는 MetPy API 경계에서만 붙임
+    # 세 프로파일을 (3, N) 버퍼 하나(행: PA, TA, TD)에 담아 그대로 반환
+    # (뷰 세 개로 나눠 반환하면 st.cache_data 피클 왕복 후 각각 따로 복사됨)
+    sounding = np.empty((3, len(arr)), dtype=np.float32)
+    sounding[:] = arr[:, 1:].T
+
+    # DataFrame은 원시 데이터 미리보기(st.dataframe)용으로만 만듦
+    df = pd.DataFrame(
+        {
+            "YYMMDDHHMI": arr[:, 0].astype(np.int64).astype(str),
+            "PA": sounding[0],
+            "TA": sounding[1],
+            "TD": sounding[2],
+        }
+    )
+
+    result = (df, sounding, obs_time)
+
+    # 파싱까지 성공한 응답만 다음 조건부 요청의 기준으로 저장
+    # (인증 오류 페이지·파싱 실패 시 이전 결과와 검증 헤더를 그대로 둠)
+    store[url] = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "result": result,
+    }
+    return result
+
+
+def parcel_and_cape(sounding):
+    # 공기덩이 곡선(°C)과 CAPE/CIN(J/kg) — Numba 경로 우선, 없으면 MetPy
+    p_hpa, t_c, td_c = sounding[0], sounding[1], sounding[2]
+    if calc_fast is not None:
+        # float32 배열을 복사 없이 그대로 넘김 (내부 계산은 float64)
+        prof = calc_fast.parcel_profile_bolton(p_hpa, float(t_c[0]), float(td_c[0]))
+        cape, cin = calc_fast.cape_cin(p_hpa, t_c, td_c, prof)
+        return prof, cape, cin
+
+    p = p_hpa * units.hPa
+    t = t_c * units.degC
+    td = td_c * units.degC
+    prof = mpcalc.parcel_profile(p, t[0], td[0])
+    cape, cin = mpcalc.cape_cin(p, t, td, prof)
+    return prof.to("degC").magnitude, cape.m_as("J/kg"), cin.m_as("J/kg")
+
+
+@st.cache_resource
+def _skewt_background():
+    # 건조/습윤단열선, 혼합비선은 축 범위(1050→100 hPa, −40→40 °C)만으로 정해지므로
+    # 한 번만 MetPy로 계산해 선분과 스타일을 보관
+    skew = SkewT(Figure(figsize=(6, 9)), rotation=45)
+    skew.ax.set_ylim(1050, 100)
+    skew.ax.set_xlim(-40, 40)
+
+    background = []
+    for coll in (skew.plot_dry_adiabats(), skew.plot_moist_adiabats(), skew.plot_mixing_lines()):
+        background.append((
+            coll.get_segments(),
+            {
+                "colors": coll.get_edgecolor(),
+                # get_linestyle()은 선 굵기로 이미 늘린 대시라 다시 넘기면 두 번 늘어남
+                # — MetPy 기본값인 이름("dashed")으로 보관
+                "linestyles": "dashed",
+                "linewidths": coll.get_linewidth(),
+                "alpha": coll.get_alpha(),
+                "zorder": coll.get_zorder(),
+            },
+        ))
+    return background
+
+
+def add_skewt_background(skew):
+    # skew.plot_dry_adiabats() / plot_moist_adiabats() / plot_mixing_lines() 대신 사용
+    for segments, style in _skewt_background():
+        skew.ax.add_collection(LineCollection(segments, **style), autolim=False)
+
+
+def preview_frame(df, n=10):
+    # 원시 데이터 expander 안에서만 datetime 열을 만듦
+    head = df.head(n).copy()
+    head.insert(
+        0, "datetime", pd.to_datetime(head["YYMMDDHHMI"], format="%Y%m%d%H%M", cache=True)
+    )
+    return head
+
+
+def downsample_levels(profiles, n_levels=200):
+    # 그림용 — 층이 많으면 log-p 등간격 n_levels 층으로 보간 (그림 영역은 100 hPa까지)
+    # profiles는 (k, N) 배열, 첫 행이 기압
+    p_hpa = profiles[0]
+    if p_hpa.size <= n_levels:
+        return profiles
+
+    out = np.empty((len(profiles), n_levels), dtype=np.float32)
+    out[0] = np.geomspace(p_hpa.max(), max(p_hpa.min(), 100.0), n_levels)
+    # np.interp는 x가 증가해야 하므로 -ln p 사용
+    x = -np.log(p_hpa)
+    x_grid = -np.log(out[0])
+    for k in range(1, len(profiles)):
+        out[k] = np.interp(x_grid, x, profiles[k])
+    return out
+
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def fetch_sounding_cached(url):
+    # 관측은 하루 두 번이라 30분 동안은 rerun마다 다시 받지 않음
+    return fetch_sounding(url=url)
+
+
+def _optimize_png(buf):
+    # 선 그래프라 64색 팔레트 PNG로 충분 — 전송 크기를 크게 줄임
+    buf.seek(0)
+    im = Image.open(buf).convert("RGB")
+    out = io.BytesIO()
+    im.convert("P", palette=Image.Palette.ADAPTIVE, colors=64).save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+
+def create_skewt_figure(sounding, obs_time):
+    # 단위 없는 배열(hPa, °C)을 그대로 그림 — 단위는 MetPy 계산 경계에서만 붙임
+    # pyplot 상태 머신 대신 Figure 직접 생성 (Streamlit 세션 스레드끼리 공유 상태 없음)
+    fig = Figure(figsize=(6, 9), dpi=100, layout=None)
+    skew = SkewT(fig, rotation=45)
+    # 그림 크기·축 범위·제목이 고정이라 tight_layout 대신 여백을 한 번만 지정
+    fig.subplots_adjust(left=0.12, right=0.95, top=0.93, bottom=0.08)
+    skew.ax.set_ylim(1050, 100)
+    skew.ax.set_xlim(-40, 40)
+
+    add_skewt_background(skew)
+
+    # 공기덩이 곡선과 CAPE/CIN은 전체 관측 층으로 계산
+    prof, cape, cin = parcel_and_cape(sounding)
+    # 수백 층을 그대로 그리면 선·음영 다각형 꼭짓점만 늘어나므로 그릴 때만 200층으로 줄임
+    p_hpa, t_c, td_c, prof = downsample_levels(np.vstack((sounding, prof)))
+    p = p_hpa * units.hPa
+
+    skew.plot(p_hpa, t_c, "r", linewidth=2, label="Temperature")
+    skew.plot(p_hpa, td_c, "g", linewidth=2, label="Dewpoint")
+    skew.plot(p_hpa, prof, "k", linewidth=1.5, label="Parcel")
+    # shade_cin은 내부에서 LCL을 계산하므로 단위 필요
+    skew.shade_cin(p, t_c * units.degC, prof * units.degC, td_c * units.degC)
+    skew.shade_cape(p_hpa, t_c, prof)
+
+    skew.ax.set_xlabel("Temperature (°C)")
+    skew.ax.set_ylabel("Pressure (hPa)")
+    skew.ax.set_title(
+        f"Skew-T Log-P  {obs_time:%Y-%m-%d %H:%M}\n"
+        f"CAPE {cape:.0f} J/kg, CIN {cin:.0f} J/kg"
+    )
+    skew.ax.legend(loc="upper left")
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def render_skewt_png(obs_iso: str, sounding) -> bytes:
+    # 같은 관측 시각이면 MetPy/Matplotlib 다시 그리지 않고 PNG 바이트 재사용
+    # (fetch_sounding이 단위 없는 배열을 주므로 캐시 해싱이 빠름)
+    fig = create_skewt_figure(sounding, datetime.fromisoformat(obs_iso))
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=100)
+    return _optimize_png(buf)
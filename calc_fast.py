@@ -0,0 +1,208 @@
+import math
+
+import numpy as np
+from numba import njit
+
+# MetPy와 같은 상수 (SI)
+RD = 287.04749  # 건조공기 기체상수 J/(kg K)
+CP_D = 1004.6662  # 건조공기 정압비열 J/(kg K)
+LV = 2.50084e6  # 증발잠열 J/kg
+EPSILON = 0.6219569  # Rd / Rv
+KAPPA = RD / CP_D
+ZERO_C = 273.15
+
+# 습윤단열선 적분 간격 (ln p 기준)
+_DLNP_MAX = 0.02
+
+
+@njit(cache=True, fastmath=True)
+def _saturation_mixing_ratio(p_hpa, t_k):
+    # Bolton(1980) 포화수증기압
+    t_c = t_k - ZERO_C
+    es = 6.112 * math.exp(17.67 * t_c / (t_c + 243.5))
+    return EPSILON * es / (p_hpa - es)
+
+
+@njit(cache=True, fastmath=True)
+def _moist_dt_dlnp(p_hpa, t_k):
+    rs = _saturation_mixing_ratio(p_hpa, t_k)
+    return (RD * t_k + LV * rs) / (CP_D + LV * LV * rs * EPSILON / (RD * t_k * t_k))
+
+
+@njit(cache=True, fastmath=True)
+def _moist_step(p0, t0, p1):
+    # p0 -> p1 까지 ln p 에 대해 RK4 적분 (기압 hPa, 기온 K)
+    lnp0 = math.log(p0)
+    span = math.log(p1) - lnp0
+    n = max(1, int(math.ceil(abs(span) / _DLNP_MAX)))
+    h = span / n
+    t = t0
+    for k in range(n):
+        lnp = lnp0 + k * h
+        k1 = _moist_dt_dlnp(math.exp(lnp), t)
+        k2 = _moist_dt_dlnp(math.exp(lnp + 0.5 * h), t + 0.5 * h * k1)
+        k3 = _moist_dt_dlnp(math.exp(lnp + 0.5 * h), t + 0.5 * h * k2)
+        k4 = _moist_dt_dlnp(math.exp(lnp + h), t + h * k3)
+        t += h * (k1 + 2.0 * k2 + 2.0 * k3 + k4) / 6.0
+    return t
+
+
+@njit(cache=True, fastmath=True)
+def lcl_bolton(p0, t0, td0):
+    # 상승응결고도 (hPa, °C) — Bolton(1980) 식 15
+    t_k = t0 + ZERO_C
+    td_k = td0 + ZERO_C
+    t_lcl = 1.0 / (1.0 / (td_k - 56.0) + math.log(t_k / td_k) / 800.0) + 56.0
+    p_lcl = p0 * (t_lcl / t_k) ** (1.0 / KAPPA)
+    return p_lcl, t_lcl - ZERO_C
+
+
+@njit(cache=True, fastmath=True)
+def moist_lapse(p, t0, p0):
+    # 기준 (p0, t0) 에서 출발한 습윤단열선 기온 (p: hPa, 기온: K)
+    n = p.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    p_prev = p0
+    t_prev = t0
+    for i in range(n):
+        t_prev = _moist_step(p_prev, t_prev, p[i])
+        p_prev = p[i]
+        out[i] = t_prev
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def parcel_profile_bolton(p, t0, td0):
+    # 지상 공기덩이 상승 곡선 (p: hPa, t0/td0/반환값: °C)
+    n = p.shape[0]
+    prof = np.empty(n, dtype=np.float64)
+    p_lcl, t_lcl = lcl_bolton(p[0], t0, td0)
+    t0_k = t0 + ZERO_C
+
+    # LCL 아래: 건조단열
+    k = 0
+    while k < n and p[k] >= p_lcl:
+        prof[k] = t0_k * (p[k] / p[0]) ** KAPPA - ZERO_C
+        k += 1
+    # LCL 위: LCL에서 출발한 습윤단열
+    prof[k:] = moist_lapse(p[k:], t_lcl + ZERO_C, p_lcl) - ZERO_C
+    return prof
+
+
+@njit(cache=True, fastmath=True)
+def _virtual_temperature(t_k, w):
+    return t_k * (w + EPSILON) / (EPSILON * (1.0 + w))
+
+
+@njit(cache=True, fastmath=True)
+def _isclose(a, b):
+    # np.isclose 기본 허용오차
+    return abs(a - b) <= 1e-8 + 1e-5 * abs(b)
+
+
+@njit(cache=True, fastmath=True)
+def _less_or_close(a, b):
+    return a < b or _isclose(a, b)
+
+
+@njit(cache=True, fastmath=True)
+def _crossing(p0, p1, d0, d1):
+    # 두 층 사이 부력 0 교차 기압 (ln p 선형보간)
+    lnp0 = math.log(p0)
+    lnp1 = math.log(p1)
+    return math.exp((d1 * lnp0 - d0 * lnp1) / (d1 - d0))
+
+
+@njit(cache=True, fastmath=True)
+def cape_cin(p, t, td, prof):
+    # 사다리꼴 적분 CAPE / CIN (J/kg), 입력은 기압 내림차순 hPa / °C
+    # LFC·EL 선택과 적분 구간은 MetPy cape_cin(which_lfc="bottom", which_el="top")과 같고,
+    # 남는 차이는 가온도용 혼합비를 Bolton 포화수증기압으로 구하는 데서만 생긴다
+    n = p.shape[0]
+    p_lcl, _ = lcl_bolton(p[0], t[0], td[0])
+    w0 = _saturation_mixing_ratio(p[0], td[0] + ZERO_C)
+
+    # 환경·공기덩이 모두 가온도로 부력 계산
+    tv_env = np.empty(n, dtype=np.float64)
+    diff = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        w_env = _saturation_mixing_ratio(p[i], td[i] + ZERO_C)
+        tv_env[i] = _virtual_temperature(t[i] + ZERO_C, w_env)
+        w_parcel = w0 if p[i] > p_lcl else _saturation_mixing_ratio(p[i], prof[i] + ZERO_C)
+        diff[i] = _virtual_temperature(prof[i] + ZERO_C, w_parcel) - tv_env[i]
+
+    # MetPy lfc/el은 가온도 기준 LCL을 쓴다
+    p_lcl_v, _ = lcl_bolton(p[0], tv_env[0] + diff[0] - ZERO_C, td[0])
+
+    # LFC: LCL 위에서 가장 아래쪽의 음->양 교차
+    start = 1 if _isclose(tv_env[0] + diff[0], tv_env[0]) else 0
+    lfc_p = -1.0
+    any_lfc = False
+    for i in range(start, n - 1):
+        if diff[i] <= 0.0 < diff[i + 1]:
+            x = _crossing(p[i], p[i + 1], diff[i], diff[i + 1])
+            any_lfc = True
+            if x < p_lcl_v:
+                lfc_p = x
+                break
+    if lfc_p < 0.0:
+        if not any_lfc:
+            # 교차가 없으면 LCL 위가 모두 음의 부력일 때만 LFC 없음, 아니면 LFC = LCL
+            for i in range(n):
+                warm = diff[i] > 0.0 and not _isclose(diff[i] + tv_env[i], tv_env[i])
+                if p[i] < p_lcl_v and warm:
+                    lfc_p = p_lcl_v
+                    break
+        else:
+            # 음->양 교차가 모두 LCL 아래면 양->음 교차도 모두 LCL 아래일 때 LFC 없음
+            el_min = np.inf
+            for i in range(1, n - 1):
+                if diff[i] >= 0.0 > diff[i + 1]:
+                    el_min = min(el_min, _crossing(p[i], p[i + 1], diff[i], diff[i + 1]))
+            if el_min == np.inf or el_min <= p_lcl_v:
+                lfc_p = p_lcl_v
+        if lfc_p < 0.0:
+            return 0.0, 0.0
+
+    # EL: LCL 위 가장 위쪽의 양->음 교차, 없으면 최상층
+    el_p = p[n - 1]
+    if diff[n - 1] <= 0.0:
+        x_top = -1.0
+        for i in range(1, n - 1):
+            if diff[i] >= 0.0 > diff[i + 1]:
+                x_top = _crossing(p[i], p[i + 1], diff[i], diff[i + 1])
+        if 0.0 < x_top < p_lcl_v:
+            el_p = x_top
+
+    # 관측 층 사이 부력 0 교차점을 끼워 넣고 ln p 사다리꼴 적분
+    # CAPE는 LFC~EL, CIN은 지상~LFC 순적분
+    cape = 0.0
+    cin = 0.0
+    p_prev = p[0]
+    d_prev = diff[0]
+    p_cand = p[0]
+    for i in range(1, n):
+        for m in range(2):
+            if m == 0:
+                # 층 안에서 부호가 바뀌면 교차점 먼저 (MetPy처럼 지상 첫 층은 제외)
+                if i < 2 or np.sign(diff[i - 1]) == np.sign(diff[i]):
+                    continue
+                p_new = _crossing(p[i - 1], p[i], diff[i - 1], diff[i])
+                d_new = 0.0
+            else:
+                p_new = p[i]
+                d_new = diff[i]
+            # 1e-6 hPa 이내로 겹치는 점은 위쪽 것을 버린다
+            close = p_cand - p_new <= 1e-6
+            p_cand = p_new
+            if close:
+                continue
+            area = 0.5 * (d_prev + d_new) * (math.log(p_prev) - math.log(p_new))
+            if _less_or_close(p_prev, lfc_p) and _less_or_close(el_p, p_new):
+                cape += area
+            if _less_or_close(lfc_p, p_new):
+                cin += area
+            p_prev = p_new
+            d_prev = d_new
+    # 지상~LFC 순적분이 양수면 CIN 0 (MetPy와 동일)
+    return RD * cape, RD * min(cin, 0.0)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+mpcalc = pytest.importorskip("metpy.calc")
+from metpy.units import units  # noqa: E402
+
+import calc_fast  # noqa: E402
+
+
+def _sounding(t0=30.0, dd0=3.0, cap=0.0, cap_p=850.0, cap_width=30.0, drying=2.0):
+    # 하층 8.5 K/km, 그 위 6.8 K/km, 12 km 위 등온인 합성 연직분포 (+ 가우시안 역전층)
+    p = np.geomspace(1000.0, 100.0, 60)
+    z = -7.0 * np.log(p / 1000.0)
+    t = t0 - 8.5 * np.minimum(z, 3.0) - 6.8 * np.clip(z - 3.0, 0.0, None)
+    t = np.maximum(t, t[np.argmin(np.abs(z - 12.0))])
+    t += cap * np.exp(-(((p - cap_p) / cap_width) ** 2))
+    td = np.minimum(t - dd0 - drying * (1000.0 - p) / 100.0, t)
+    return p, t, td
+
+
+SOUNDINGS = {
+    "normal": _sounding(),
+    # LCL 바로 위 얕은 양의 부력층을 역전층이 덮는 경우 (LFC는 역전층 위)
+    "capped_8k": _sounding(cap=8.0, cap_p=880.0, cap_width=25.0),
+    "capped_10k": _sounding(cap=10.0, cap_p=850.0, cap_width=30.0),
+    "capped_dry": _sounding(t0=30.0, dd0=5.0, cap=8.0, cap_p=820.0, cap_width=40.0),
+    "weak": _sounding(t0=22.0, dd0=8.0, drying=4.0),
+    "stable": _sounding(t0=15.0, dd0=15.0, drying=5.0),
+}
+
+
+def _metpy_parcel(p, t, td):
+    return mpcalc.parcel_profile(p * units.hPa, t[0] * units.degC, td[0] * units.degC).to("degC").m
+
+
+def _metpy_cape_cin(p, t, td, prof):
+    cape, cin = mpcalc.cape_cin(p * units.hPa, t * units.degC, td * units.degC, prof * units.degC)
+    return cape.m_as("J/kg"), cin.m_as("J/kg")
+
+
+@pytest.mark.parametrize("name", SOUNDINGS)
+def test_cape_cin_matches_metpy_same_profile(name):
+    # 같은 공기덩이 곡선이면 LFC/EL 선택과 적분이 MetPy와 일치해야 함
+    p, t, td = SOUNDINGS[name]
+    prof = _metpy_parcel(p, t, td)
+    cape, cin = calc_fast.cape_cin(p, t, td, prof)
+    ref_cape, ref_cin = _metpy_cape_cin(p, t, td, prof)
+    assert cape == pytest.approx(ref_cape, rel=1e-3, abs=1.0)
+    assert cin == pytest.approx(ref_cin, rel=1e-3, abs=1.0)
+
+
+@pytest.mark.parametrize("name", SOUNDINGS)
+def test_cape_cin_matches_metpy_bolton_profile(name):
+    # Bolton 곡선까지 포함한 전체 경로는 포화수증기압 식 차이만큼만 벗어남
+    p, t, td = SOUNDINGS[name]
+    prof = calc_fast.parcel_profile_bolton(p, t[0], td[0])
+    cape, cin = calc_fast.cape_cin(p, t, td, prof)
+    ref_cape, ref_cin = _metpy_cape_cin(p, t, td, _metpy_parcel(p, t, td))
+    assert cape == pytest.approx(ref_cape, rel=0.03, abs=5.0)
+    assert cin == pytest.approx(ref_cin, rel=0.05, abs=5.0)
+
+
+@pytest.mark.parametrize("name", SOUNDINGS)
+def test_parcel_profile_matches_metpy(name):
+    p, t, td = SOUNDINGS[name]
+    prof = calc_fast.parcel_profile_bolton(p, t[0], td[0])
+    np.testing.assert_allclose(prof, _metpy_parcel(p, t, td), atol=0.5)
+
+
+def test_moist_lapse_matches_metpy():
+    p = np.geomspace(900.0, 100.0, 40)
+    t = calc_fast.moist_lapse(p, 293.15, 900.0)
+    ref = mpcalc.moist_lapse(p * units.hPa, 20.0 * units.degC, 900.0 * units.hPa).m_as("K")
+    np.testing.assert_allclose(t, ref, atol=0.5)